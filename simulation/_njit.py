@@ -0,0 +1,12 @@
+"""
+Optional Numba support.
+`njit` compiles with numba when it is installed, otherwise functions run as plain Python.
+"""
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
@@ -1,8 +1,53 @@
 import numpy as np
-import random
 from .utils import price_to_sqrtp
 from .logger import logger
 from .constants import q96, eth
+from .pool import _find_L_and_nearest_range_core
+from ._njit import njit
+
+
+@njit(cache=True, fastmath=True)
+def _optimize_trade_core(curr_sqrtp, ideal_sqrtp, ZtO, fee, ticks, ticks_L, q96):
+    """
+    Walk initialized ticks from curr_sqrtp to ideal_sqrtp, accumulating swap amounts.
+    Prices and q96 are floats, amounts are returned unscaled as (sum_delta_x, sum_delta_y).
+    """
+    sum_delta_x = 0.0
+    sum_delta_y = 0.0
+    new_price = curr_sqrtp
+    inv_new_price = 1 / curr_sqrtp
+    one_plus_fee = 1 + fee
+
+    while new_price != ideal_sqrtp:
+        nearestPrice, totalLiq = _find_L_and_nearest_range_core(new_price, ZtO, ticks, ticks_L)
+
+        if ZtO:
+            last = nearestPrice <= ideal_sqrtp
+            target = ideal_sqrtp if last else nearestPrice
+            inv_target = 1 / target
+            delta_y = (target - new_price) * totalLiq / q96
+            delta_x = (inv_target - inv_new_price) * totalLiq * one_plus_fee * q96
+        else:
+            last = nearestPrice >= ideal_sqrtp
+            target = ideal_sqrtp if last else nearestPrice
+            inv_target = 1 / target
+            delta_y = (target - new_price) * totalLiq * one_plus_fee / q96
+            delta_x = (inv_target - inv_new_price) * totalLiq * q96
+
+        sum_delta_x += delta_x
+        sum_delta_y += delta_y
+        if last:
+            break
+        new_price, inv_new_price = nearestPrice, inv_target
+
+    return sum_delta_x, sum_delta_y
+
+
+def _no_trade_region(currentPricePool, fee, fee_outside):
+    """(left, right) external price bounds around the pool price within which no deal is attempted."""
+    return (currentPricePool * (1 - fee - fee_outside),
+            currentPricePool * (1 + fee + fee_outside))
+
 
 class Arbitrage:
     """
@@ -17,6 +62,9 @@ class Arbitrage:
         skip (float): Probability to skip deal attempts (0 to 1).
     """
 
+    # Number of uniform samples drawn at once for skipping deals
+    RAND_BUFFER_SIZE = 65536
+
     def __init__(self, minGasPrice, profitToGasRatio, pool, fee_outside=0.001, skip=0):
         self.skip = skip
         self.minGasPrice = minGasPrice
@@ -32,6 +80,9 @@ class Arbitrage:
         self.lastPriceInPool = None
         self.lastPriceOutside = None
 
+        self._rand_buf = np.empty(0)
+        self._rand_idx = 0
+
     def deal(self, currentPriceOutside):
         """
         Executes an arbitrage deal if price deviation is profitable.
@@ -42,14 +93,19 @@ class Arbitrage:
         Returns:
             bool or 0: False if no deal executed, 0 if skipped due to random chance.
         """
-        if random.random() < self.skip:
+        if self.skip and self._random() < self.skip:
             return 0
 
         currentPricePool = self.pool.currentPrice
         fee = self.pool.fee
+        fee_outside = self.fee_outside
 
-        left_ntr = currentPricePool * (1 - fee - self.fee_outside)
-        right_ntr = currentPricePool * (1 + fee + self.fee_outside)
+        left_ntr, right_ntr = _no_trade_region(currentPricePool, fee, fee_outside)
+
+        # Most blocks fall inside the no-trade region, leave before any other work
+        if left_ntr <= currentPriceOutside <= right_ntr:
+            logger.info('Arb: Price within no-trade region, no action taken.')
+            return
 
         if self.lastPriceInPool == currentPricePool and self.lastPriceOutside == currentPriceOutside:
             logger.info('Arb: No price change, skipping deals.')
@@ -58,56 +114,89 @@ class Arbitrage:
         self.lastPriceInPool = currentPricePool
         self.lastPriceOutside = currentPriceOutside
 
-        logger.info(f'Arb: No-trade region [{left_ntr:.2f} - {right_ntr:.2f}], Pool price: {currentPricePool:.2f}, Outside price: {currentPriceOutside:.2f}')
+        logger.info('Arb: No-trade region [%.2f - %.2f], Pool price: %.2f, Outside price: %.2f',
+                    left_ntr, right_ntr, currentPricePool, currentPriceOutside)
 
         # Price below lower no-trade boundary — buy from pool, sell outside
         if currentPriceOutside < left_ntr:
-            price_after_arb = currentPriceOutside / (1 - fee - self.fee_outside)
+            price_after_arb = currentPriceOutside / (1 - fee - fee_outside)
             result = self._optimize_trade(price_after_arb, ZtO=True)
             if not result:
                 return False
 
             delta_x, delta_y = result  # sell dx, buy dy (price drops)
-            x_return = -delta_y / currentPriceOutside * (1 - self.fee_outside)
+            x_return = -delta_y / currentPriceOutside * (1 - fee_outside)
             arb_profit = (x_return - delta_x) * currentPriceOutside
             real_profit = arb_profit * (1 - self.profitToGasRatio)
             burned_profit = arb_profit * self.profitToGasRatio
 
-            logger.info(f'Arb profit potential: buy {delta_y:.2f}y, sell for {x_return:.2f}x; gross profit {arb_profit:.2f}y, net {real_profit:.2f}y')
+            logger.info('Arb profit potential: buy %.2fy, sell for %.2fx; gross profit %.2fy, net %.2fy',
+                        delta_y, x_return, arb_profit, real_profit)
 
             if burned_profit < self.minGasPrice:
-                logger.info(f'Arb profit {burned_profit:.2f} below min gas price {self.minGasPrice}')
+                logger.info('Arb profit %.2f below min gas price %s', burned_profit, self.minGasPrice)
                 return False
 
-            logger.info(f'Arb: Executing swap dx={delta_x}, ZtO=True')
+            logger.info('Arb: Executing swap dx=%s, ZtO=True', delta_x)
             self.pool.swap(delta_x, ZtO=True, simulate=False)
             self._update_stats(real_profit, delta_x * currentPricePool, burned_profit)
 
         # Price above upper no-trade boundary — buy from outside, sell in pool
         elif currentPriceOutside > right_ntr:
-            price_after_arb = currentPriceOutside / (1 + fee + self.fee_outside)
+            price_after_arb = currentPriceOutside / (1 + fee + fee_outside)
             result = self._optimize_trade(price_after_arb, ZtO=False)
             if not result:
                 return False
 
             delta_y, delta_x = result  # buy dx, sell dy (price rises)
-            y_return = -delta_x * currentPriceOutside * (1 - self.fee_outside)
+            y_return = -delta_x * currentPriceOutside * (1 - fee_outside)
             arb_profit = y_return - delta_y
             real_profit = arb_profit * (1 - self.profitToGasRatio)
             burned_profit = arb_profit * self.profitToGasRatio
 
-            logger.info(f'Arb profit potential: buy {delta_x:.2f}x, sell for {y_return:.2f}y; gross profit {arb_profit:.2f}y, net {real_profit:.2f}y')
+            logger.info('Arb profit potential: buy %.2fx, sell for %.2fy; gross profit %.2fy, net %.2fy',
+                        delta_x, y_return, arb_profit, real_profit)
 
             if burned_profit < self.minGasPrice:
-                logger.info(f'Arb profit {burned_profit:.2f} below min gas price {self.minGasPrice}')
+                logger.info('Arb profit %.2f below min gas price %s', burned_profit, self.minGasPrice)
                 return False
 
-            logger.info(f'Arb: Executing swap dy={delta_y}, ZtO=False')
+            logger.info('Arb: Executing swap dy=%s, ZtO=False', delta_y)
             self.pool.swap(delta_y, ZtO=False, simulate=False)
             self._update_stats(real_profit, delta_y, burned_profit)
 
-        else:
-            logger.info('Arb: Price within no-trade region, no action taken.')
+    def _refill_random(self):
+        """Draws a new buffer of uniform samples with NumPy once the current one is exhausted."""
+        if self._rand_idx == len(self._rand_buf):
+            self._rand_buf = np.random.random(self.RAND_BUFFER_SIZE)
+            self._rand_idx = 0
+
+    def _random(self):
+        """Returns the next uniform sample in [0, 1)."""
+        self._refill_random()
+        r = self._rand_buf[self._rand_idx]
+        self._rand_idx += 1
+        return r
+
+    def pass_blocks(self, n):
+        """
+        Consumes the skip samples `deal` would draw for `n` blocks inside the no-trade region,
+        keeping the random stream aligned with calling `deal` on every block.
+        """
+        if not self.skip:
+            return
+        while n > 0:
+            self._refill_random()
+            step = min(n, len(self._rand_buf) - self._rand_idx)
+            self._rand_idx += step
+            n -= step
+
+    def no_trade_region(self):
+        """
+        Returns:
+            tuple: (left, right) external price bounds within which no deal is attempted.
+        """
+        return _no_trade_region(self.pool.currentPrice, self.pool.fee, self.fee_outside)
 
     def _optimize_trade(self, idealPrice, ZtO=True):
         """
@@ -120,97 +209,19 @@ class Arbitrage:
         Returns:
             tuple or None: Amounts to swap (delta_x, delta_y) or None if not feasible.
         """
-        sum_delta_x = 0
-        sum_delta_y = 0
+        pool = self.pool
+        currentSqrtPrice = pool.currentSqrtPrice
         idealPrice = price_to_sqrtp(idealPrice)
-        new_price = self.pool.currentSqrtPrice
-
-        while new_price != idealPrice:
-            nearestPrice, activePositions, totalLiq = self._find_L_and_nearest_range(new_price, ZtO)
-
-            if ZtO:
-                if nearestPrice <= idealPrice:
-                    delta_price_yx = idealPrice - new_price
-                    delta_price_xy = 1 / idealPrice - 1 / new_price
-                    delta_y = delta_price_yx * totalLiq / q96
-                    delta_x = delta_price_xy * totalLiq * (1 + self.pool.fee) * q96
-                    return sum_delta_x / eth + delta_x / eth, sum_delta_y / eth + delta_y / eth
-                else:
-                    delta_price_yx = nearestPrice - new_price
-                    delta_price_xy = 1 / nearestPrice - 1 / new_price
-                    delta_y = delta_price_yx * totalLiq / q96
-                    delta_x = delta_price_xy * totalLiq * (1 + self.pool.fee) * q96
-                    sum_delta_y += delta_y
-                    sum_delta_x += delta_x
-                    new_price = nearestPrice
-
-            else:
-                if nearestPrice >= idealPrice:
-                    delta_price_yx = idealPrice - new_price
-                    delta_price_xy = 1 / idealPrice - 1 / new_price
-                    delta_y = delta_price_yx * totalLiq * (1 + self.pool.fee) / q96
-                    delta_x = delta_price_xy * totalLiq * q96
-                    return sum_delta_y / eth + delta_y / eth, sum_delta_x / eth + delta_x / eth
-                else:
-                    delta_price_yx = nearestPrice - new_price
-                    delta_price_xy = 1 / nearestPrice - 1 / new_price
-                    delta_y = delta_price_yx * totalLiq * (1 + self.pool.fee) / q96
-                    delta_x = delta_price_xy * totalLiq * q96
-                    sum_delta_y += delta_y
-                    sum_delta_x += delta_x
-                    new_price = nearestPrice
-
-    def _find_L_and_nearest_range(self, price, ZtO=True):
-        """
-        Finds nearest initialized price boundary and active liquidity positions.
+        if idealPrice == currentSqrtPrice:
+            return None
 
-        Args:
-            price (float): Reference sqrt price.
-            ZtO (bool): Direction (True: token0->token1).
+        sum_delta_x, sum_delta_y = _optimize_trade_core(
+            currentSqrtPrice, idealPrice, ZtO, pool.fee,
+            pool._ticks, pool._ticks_L, float(q96))
 
-        Returns:
-            tuple: (nearestInitializedPrice, activePositions, totalLiquidity)
-        """
         if ZtO:
-            nearestPrice = 0
-        else:
-            nearestPrice = 1e12 * q96  # Large number
-
-        activePositions = {}
-        totalLiq = 0
-
-        for id, pos in self.pool.liq_bitmap.items():
-            pa = pos['pa']
-            pb = pos['pb']
-
-            if ZtO:
-                if pb < price and price - pb < price - nearestPrice:
-                    nearestPrice = pb
-                if pa < price and price - pa < price - nearestPrice:
-                    nearestPrice = pa
-                if pa < price <= pb:
-                    activePositions[id] = pos
-                    totalLiq += pos['L']
-            else:
-                if pb > price and pb - price < nearestPrice - price:
-                    nearestPrice = pb
-                if pa > price and pa - price < nearestPrice - price:
-                    nearestPrice = pa
-                if pa <= price < pb:
-                    activePositions[id] = pos
-                    totalLiq += pos['L']
-
-        # Clean edge case of single position ending exactly at price
-        if len(activePositions) == 1:
-            pos = next(iter(activePositions.values()))
-            if ZtO and pos['pa'] == price:
-                activePositions.clear()
-                totalLiq = 0
-            elif not ZtO and pos['pb'] == price:
-                activePositions.clear()
-                totalLiq = 0
-
-        return nearestPrice, activePositions, totalLiq
+            return sum_delta_x / eth, sum_delta_y / eth
+        return sum_delta_y / eth, sum_delta_x / eth
 
     def _update_stats(self, profit, volume, burned):
         """Updates cumulative statistics after a successful trade."""
@@ -1,14 +1,63 @@
-from .utils import price_to_sqrtp, liquidity0, liquidity1
+import logging
+import numpy as np
+from .utils import price_to_sqrtp, price_to_sqrtp_batch, liquidity0_sorted, liquidity1_sorted
 from .constants import q96, eth
 from .logger import logger
-import copy
+from ._njit import njit
+
+# Sentinel tick above any price, returned as nearest tick when no tick exists above the price
+_NO_TICK_ABOVE = 1e12 * q96
+
+
+@njit(cache=True)
+def _find_L_and_nearest_range_core(price, ZtO, ticks, ticks_L):
+    """
+    Find the nearest initialized tick in swap direction and the liquidity active at `price`.
+    `ticks` are sorted tick prices enclosed by 0 and _NO_TICK_ABOVE sentinels,
+    `ticks_L` the liquidity active right above each tick.
+    Returns (nearestPrice, totalLiquidity).
+    """
+    # Sentinels keep both indices in bounds for any positive price
+    if ZtO:
+        i = np.searchsorted(ticks, price, side='left') - 1
+        return ticks[i], ticks_L[i]
+
+    i = np.searchsorted(ticks, price, side='right') - 1
+    return ticks[i + 1], ticks_L[i]
+
+
+class Position:
+    """
+    Liquidity position: sqrt price range, liquidity, fees and token balances.
+    """
+
+    __slots__ = ('pa', 'pb', 'L', 'fee_in_y', 'fee_x', 'fee_y', 'x_real', 'y_real',
+                 'first_price', 'x_real_start', 'y_real_start')
+
+    def __init__(self, **fields):
+        if fields.keys() != set(self.__slots__):
+            raise TypeError(f'Position expects fields {self.__slots__}, got {tuple(fields)}')
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return 'Position(' + ', '.join(f'{name}={getattr(self, name)}' for name in self.__slots__) + ')'
+
 
 class Pool:
     """
     Uniswap V3-style liquidity pool simulation.
     Manages liquidity positions, fees, price updates, and swaps.
+
+    Positions are stored as parallel NumPy arrays (one row per position,
+    e.g. `_pa`, `_pb`, `_L`), `liq_bitmap` maps position id to its row.
+    Position bounds are also indexed as sorted ticks (`_ticks`) with the liquidity
+    active right above each tick (`_ticks_L`), swaps walk this index tick by tick.
     """
 
+    # Per-position fields, each stored as a float64 array `_<field>`
+    _FIELDS = Position.__slots__
+
     def __init__(self, first_price, fee):
         self.first_price = first_price
         self.currentPrice = first_price
@@ -18,7 +67,10 @@ class Pool:
         self.last_fee = 0
         self.currentL = 0
         self.currentActiveID = {}
-        self.liq_bitmap = {}  # position_id: {pa, pb, L, fees, balances...}
+        self.liq_bitmap = {}  # position_id: row index in the position arrays
+        for name in self._FIELDS:
+            setattr(self, '_' + name, np.empty(0, np.float64))
+        self._index_ticks()
         self._fees_x = 0
 
         logger.info('Pool initialized')
@@ -28,43 +80,61 @@ class Pool:
         Add liquidity position with token amounts x, y and price range [pa, pb].
         Price boundaries and amounts are converted internally.
         """
+        self._add_rows([id])
+        self._set_position(id, x, y, price_to_sqrtp(pa), price_to_sqrtp(pb))
+        self._index_ticks()
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('Added liquidity: %s', self.get_position(id))
+
+    def add_liquidity_batch(self, ids, x, y, pa, pb):
+        """
+        Add many liquidity positions at once, arguments are sequences as in `add_liquidity`.
+        Price boundaries are converted in one NumPy pass and ticks are indexed once.
+        """
+        self._add_rows(ids)
+        for id, x_i, y_i, pa_i, pb_i in zip(ids, x, y, price_to_sqrtp_batch(pa), price_to_sqrtp_batch(pb)):
+            self._set_position(id, x_i, y_i, float(pa_i), float(pb_i))
+        self._index_ticks()
+
+        logger.info('Added %d liquidity positions', len(ids))
+
+    def _add_rows(self, ids):
+        """Append empty rows to the position arrays for ids not in the pool yet."""
+        new_ids = [id for id in dict.fromkeys(ids) if id not in self.liq_bitmap]
+        for id in new_ids:
+            self.liq_bitmap[id] = len(self.liq_bitmap)
+        for name in self._FIELDS:
+            setattr(self, '_' + name, np.append(getattr(self, '_' + name), np.zeros(len(new_ids))))
+
+    def _set_position(self, id, x, y, pa, pb):
+        """Write position with token amounts x, y and sqrt price range [pa, pb] into its row."""
         x *= eth
         y *= eth
-        pa = price_to_sqrtp(pa)
-        pb = price_to_sqrtp(pb)
         if pa > pb:
             pa, pb = pb, pa
 
-        if id not in self.liq_bitmap:
-            self.liq_bitmap[id] = {}
-
-        self.liq_bitmap[id].update({'pa': pa, 'pb': pb})
-
         if pa < self.currentSqrtPrice < pb:
-            liq0 = liquidity0(x, pb, self.currentSqrtPrice)
-            liq1 = liquidity1(y, self.currentSqrtPrice, pa)
-            position_liquidity = int(min(liq0, liq1))
+            liq0 = liquidity0_sorted(x, self.currentSqrtPrice, pb)
+            liq1 = liquidity1_sorted(y, pa, self.currentSqrtPrice)
+            position_liquidity = min(liq0, liq1)
         elif self.currentSqrtPrice <= pa:
-            position_liquidity = liquidity0(x, pb, pa)
+            position_liquidity = liquidity0_sorted(x, pa, pb)
         else:  # self.currentSqrtPrice >= pb
-            position_liquidity = liquidity1(y, pb, pa)
-
-        self.liq_bitmap[id]['L'] = position_liquidity
-        self.liq_bitmap[id].update({
-            'fee_in_y': 0,
-            'fee_x': 0,
-            'fee_y': 0,
-            'x_real': x,
-            'y_real': y,
-            'first_price': self.currentPrice,
-            'x_real_start': x / eth,
-            'y_real_start': y / eth
-        })
-
-        if pa <= self.currentSqrtPrice <= pb:
-            self.currentL += position_liquidity
-
-        logger.info(f'Added liquidity: {self.liq_bitmap[id]}')
+            position_liquidity = liquidity1_sorted(y, pa, pb)
+
+        row = self.liq_bitmap[id]
+        self._pa[row] = pa
+        self._pb[row] = pb
+        self._L[row] = position_liquidity
+        self._fee_in_y[row] = 0
+        self._fee_x[row] = 0
+        self._fee_y[row] = 0
+        self._x_real[row] = x
+        self._y_real[row] = y
+        self._first_price[row] = self.currentPrice
+        self._x_real_start[row] = x / eth
+        self._y_real_start[row] = y / eth
 
     def burn_liquidity(self, id):
         """
@@ -72,10 +142,50 @@ class Pool:
         Returns removed position info or logs critical if not found.
         """
         if id in self.liq_bitmap:
-            logger.info(f'Burn liquidity id={id} {self.liq_bitmap[id]}')
-            return self.liq_bitmap.pop(id)
+            position = self.get_position(id)
+            logger.info('Burn liquidity id=%s %s', id, position)
+
+            row = self.liq_bitmap.pop(id)
+            for name in self._FIELDS:
+                setattr(self, '_' + name, np.delete(getattr(self, '_' + name), row))
+            for other_id, other_row in self.liq_bitmap.items():
+                if other_row > row:
+                    self.liq_bitmap[other_id] = other_row - 1
+            self._index_ticks()
+
+            return position
         else:
-            logger.critical(f'Tried to remove non-existent liquidity id={id}')
+            logger.critical('Tried to remove non-existent liquidity id=%s', id)
+
+    def _index_ticks(self):
+        """
+        Rebuild the sorted tick index from position bounds.
+        Each tick gets +L for positions starting and -L for positions ending at it,
+        the index is enclosed by empty sentinel ticks at 0 and _NO_TICK_ABOVE.
+        Also resets currentL to the liquidity of the range holding the current sqrt price.
+        """
+        n = len(self._pa)
+        ticks, tick_rows = np.unique(np.concatenate((self._pa, self._pb)), return_inverse=True)
+
+        ticks_dL = np.zeros(len(ticks))
+        np.add.at(ticks_dL, tick_rows[:n], self._L)
+        np.add.at(ticks_dL, tick_rows[n:], -self._L)
+
+        # Zero out float residue of the running sum where no position is active
+        num_active = np.zeros(len(ticks), np.int64)
+        np.add.at(num_active, tick_rows[:n], 1)
+        np.add.at(num_active, tick_rows[n:], -1)
+        ticks_L = np.cumsum(ticks_dL)
+        ticks_L[np.cumsum(num_active) == 0] = 0
+
+        self._ticks = np.concatenate(([0.0], ticks, [_NO_TICK_ABOVE]))
+        self._ticks_L = np.concatenate(([0.0], ticks_L, [0.0]))
+        self.currentL = float(self._ticks_L[np.searchsorted(self._ticks, self.currentSqrtPrice, side='right') - 1])
+
+    def get_position(self, id):
+        """Return position fields {pa, pb, L, fees, balances...} as a Position."""
+        row = self.liq_bitmap[id]
+        return Position(**{name: getattr(self, '_' + name)[row].item() for name in self._FIELDS})
 
     def swap(self, amnt=0, ZtO=True, simulate=False):
         """
@@ -83,114 +193,142 @@ class Pool:
         ZtO=True for token0 -> token1, False for token1 -> token0.
         Returns output amount and new price if simulate=True.
         """
-        logger.debug(f'Start swap: simulate={simulate}, amnt={amnt}, ZtO={ZtO}')
+        logger.debug('Start swap: simulate=%s, amnt=%s, ZtO=%s', simulate, amnt, ZtO)
 
         saved_fee = self.fee
         self.fee = self._hook_before_swap(amnt, ZtO)
         self.last_fee = self.fee
 
+        if simulate:
+            result = self._swap_simulate(amnt, ZtO)
+            if not result:
+                return False
+            sum_delta_out, new_price, _ = result
+            return sum_delta_out, new_price
+        else:
+            return self._swap_commit(amnt, ZtO, saved_fee)
+
+    def _swap_simulate(self, amnt, ZtO):
+        """
+        Walk the swap through initialized ticks without changing pool state.
+        Returns (sum_delta_out, new_price, steps) or False if the swap is not possible,
+        steps being (delta_x, delta_y, totalLiq, new_price, last) for each price range crossed.
+        """
         if ZtO:
-            return self._swap_token0_to_token1(amnt, simulate, saved_fee)
+            return self._swap_token0_to_token1(amnt)
         else:
-            return self._swap_token1_to_token0(amnt, simulate, saved_fee)
+            return self._swap_token1_to_token0(amnt)
+
+    def _swap_commit(self, amnt, ZtO, saved_fee):
+        """Simulate the swap, then apply each of its steps to pool state."""
+        result = self._swap_simulate(amnt, ZtO)
+        if not result:
+            return False
+
+        sum_delta_out, new_price, steps = result
+        for delta_x, delta_y, totalLiq, step_price, last in steps:
+            activePositions = self._active_positions(ZtO)
+            self._update_state_after_swap(delta_x, delta_y, totalLiq, step_price, activePositions, ZtO=ZtO, last=last)
 
-    def _swap_token0_to_token1(self, amnt, simulate, saved_fee):
-        nearestPrice, activePositions, totalLiq = self._find_L_and_nearest_range(ZtO=True)
+        self._hook_after_swap(amnt, ZtO)
+        if ZtO:
+            logger.info('Swap done: %s x -> %s y, price after swap=%.3f', amnt, sum_delta_out / eth, (new_price / q96) ** 2)
+        else:
+            self.fee = saved_fee
+            logger.info('Swap done: %s y -> %s x, price after swap=%.3f', amnt, sum_delta_out / eth, (new_price / q96) ** 2)
+
+    def _swap_token0_to_token1(self, amnt):
+        ticks, ticks_L = self._ticks, self._ticks_L
+        sqrtPrice = self.currentSqrtPrice
+        # Walk down from the nearest tick below the price
+        i = np.searchsorted(ticks, sqrtPrice, side='left') - 1
+        nearestPrice, totalLiq = float(ticks[i]), float(ticks_L[i])
         delta_x_left = amnt * eth
         sum_delta_y = 0
-        saved_liq_bitmap = copy.deepcopy(self.liq_bitmap)
-        saved_price = self.currentPrice
-        saved_sqrtPrice = self.currentSqrtPrice
+        steps = []
 
         if delta_x_left == 0:
             logger.warning('delta_x_left = 0')
             return False
 
+        one_plus_fee = 1 + self.fee
+        inv_sqrtp = 1 / sqrtPrice
+
         while delta_x_left != 0:
             if totalLiq == 0:
                 logger.info('No liquidity. Reverting swap.')
-                self.liq_bitmap = saved_liq_bitmap
-                self.currentPrice = saved_price
-                self.currentSqrtPrice = saved_sqrtPrice
                 return False
 
-            delta_price_xy = delta_x_left / (1 + self.fee) / totalLiq / q96
-            new_price_xy = 1 / self.currentSqrtPrice + delta_price_xy
+            delta_price_xy = delta_x_left / one_plus_fee / totalLiq / q96
+            new_price_xy = inv_sqrtp + delta_price_xy
             new_price = 1 / new_price_xy
 
             if new_price > nearestPrice:
-                delta_price_yx = new_price - self.currentSqrtPrice
+                delta_price_yx = new_price - sqrtPrice
                 delta_y = delta_price_yx * totalLiq / q96
-                self._update_state_after_swap(delta_x_left, delta_y, totalLiq, new_price, activePositions, ZtO=True, last=True)
+                steps.append((delta_x_left, delta_y, totalLiq, new_price, True))
                 delta_x_left = 0
                 sum_delta_y += delta_y
             else:
-                delta_x = totalLiq * (1 / nearestPrice - 1 / self.currentSqrtPrice)
-                delta_x *= (1 + self.fee) * q96
-                delta_price_yx = nearestPrice - self.currentSqrtPrice
+                inv_nearest = 1 / nearestPrice
+                delta_x = totalLiq * (inv_nearest - inv_sqrtp)
+                delta_x *= one_plus_fee * q96
+                delta_price_yx = nearestPrice - sqrtPrice
                 delta_y = delta_price_yx * totalLiq / q96
-                self._update_state_after_swap(delta_x, delta_y, totalLiq, nearestPrice, activePositions, ZtO=True, last=False)
+                steps.append((delta_x, delta_y, totalLiq, nearestPrice, False))
                 delta_x_left -= delta_x
                 sum_delta_y += delta_y
-                nearestPrice, activePositions, totalLiq = self._find_L_and_nearest_range(ZtO=True)
-
-        if simulate:
-            self.liq_bitmap = saved_liq_bitmap
-            self.currentPrice = saved_price
-            self.currentSqrtPrice = saved_sqrtPrice
-            return sum_delta_y, new_price
-        else:
-            self._hook_after_swap(amnt, True)
-            logger.info(f'Swap done: {amnt} x -> {sum_delta_y / eth} y, price after swap={(new_price / q96) ** 2:.3f}')
-
-    def _swap_token1_to_token0(self, amnt, simulate, saved_fee):
-        nearestPrice, activePositions, totalLiq = self._find_L_and_nearest_range(ZtO=False)
+                sqrtPrice, inv_sqrtp = nearestPrice, inv_nearest
+                i -= 1
+                nearestPrice, totalLiq = float(ticks[i]), float(ticks_L[i])
+
+        return sum_delta_y, new_price, steps
+
+    def _swap_token1_to_token0(self, amnt):
+        ticks, ticks_L = self._ticks, self._ticks_L
+        sqrtPrice = self.currentSqrtPrice
+        # Walk up from the nearest tick above the price
+        i = np.searchsorted(ticks, sqrtPrice, side='right') - 1
+        nearestPrice, totalLiq = float(ticks[i + 1]), float(ticks_L[i])
         delta_y_left = amnt * eth
         sum_delta_x = 0
-        saved_liq_bitmap = copy.deepcopy(self.liq_bitmap)
-        saved_price = self.currentPrice
-        saved_sqrtPrice = self.currentSqrtPrice
+        steps = []
 
         if delta_y_left == 0:
             logger.warning('delta_y_left = 0')
             return False
 
+        one_plus_fee = 1 + self.fee
+        inv_sqrtp = 1 / sqrtPrice
+
         while delta_y_left != 0:
             if totalLiq == 0:
                 logger.info('No liquidity. Reverting swap.')
-                self.liq_bitmap = saved_liq_bitmap
-                self.currentPrice = saved_price
-                self.currentSqrtPrice = saved_sqrtPrice
                 return False
 
-            delta_price_yx = delta_y_left / (1 + self.fee) / totalLiq * q96
-            new_price = self.currentSqrtPrice + delta_price_yx
+            delta_price_yx = delta_y_left / one_plus_fee / totalLiq * q96
+            new_price = sqrtPrice + delta_price_yx
 
             if new_price < nearestPrice:
-                delta_price_xy = 1 / new_price - 1 / self.currentSqrtPrice
+                delta_price_xy = 1 / new_price - inv_sqrtp
                 delta_x = delta_price_xy * totalLiq * q96
-                self._update_state_after_swap(delta_x, delta_y_left, totalLiq, new_price, activePositions, ZtO=False, last=True)
+                steps.append((delta_x, delta_y_left, totalLiq, new_price, True))
                 delta_y_left = 0
                 sum_delta_x += delta_x
             else:
-                delta_y = totalLiq * (nearestPrice - self.currentSqrtPrice) / q96
-                delta_y *= (1 + self.fee)
-                delta_price_xy = 1 / nearestPrice - 1 / self.currentSqrtPrice
+                inv_nearest = 1 / nearestPrice
+                delta_y = totalLiq * (nearestPrice - sqrtPrice) / q96
+                delta_y *= one_plus_fee
+                delta_price_xy = inv_nearest - inv_sqrtp
                 delta_x = delta_price_xy * totalLiq * q96
-                self._update_state_after_swap(delta_x, delta_y, totalLiq, nearestPrice, activePositions, ZtO=False, last=False)
+                steps.append((delta_x, delta_y, totalLiq, nearestPrice, False))
                 delta_y_left -= delta_y
                 sum_delta_x += delta_x
-                nearestPrice, activePositions, totalLiq = self._find_L_and_nearest_range(ZtO=False)
+                sqrtPrice, inv_sqrtp = nearestPrice, inv_nearest
+                i += 1
+                nearestPrice, totalLiq = float(ticks[i + 1]), float(ticks_L[i])
 
-        if simulate:
-            self.liq_bitmap = saved_liq_bitmap
-            self.currentPrice = saved_price
-            self.currentSqrtPrice = saved_sqrtPrice
-            return sum_delta_x, new_price
-        else:
-            self._hook_after_swap(amnt, False)
-            self.fee = saved_fee
-            logger.info(f'Swap done: {amnt} y -> {sum_delta_x / eth} x, price after swap={(new_price / q96) ** 2:.3f}')
+        return sum_delta_x, new_price, steps
 
     def _hook_after_swap(self, amnt, ZtO):
         pass
@@ -198,64 +336,37 @@ class Pool:
     def _hook_before_swap(self, amnt, ZtO):
         return self.fee
 
-    def _find_L_and_nearest_range(self, ZtO=True):
-        """
-        Find active liquidity positions and the nearest initialized tick price in swap direction.
-        Returns (nearestPrice, activePositions, totalLiquidity).
-        """
-        nearestPrice = 0 if ZtO else 1e12 * q96
-        activePositions = {}
-        totalLiq = 0
-
-        for id, pos in self.liq_bitmap.items():
-            pa, pb = pos['pa'], pos['pb']
-
-            if ZtO:
-                if pb < self.currentSqrtPrice and (self.currentSqrtPrice - pb) < (self.currentSqrtPrice - nearestPrice):
-                    nearestPrice = pb
-                if pa < self.currentSqrtPrice and (self.currentSqrtPrice - pa) < (self.currentSqrtPrice - nearestPrice):
-                    nearestPrice = pa
-                if pa < self.currentSqrtPrice <= pb:
-                    activePositions[id] = pos
-                    totalLiq += pos['L']
-            else:
-                if pb > self.currentSqrtPrice and (pb - self.currentSqrtPrice) < (nearestPrice - self.currentSqrtPrice):
-                    nearestPrice = pb
-                if pa > self.currentSqrtPrice and (pa - self.currentSqrtPrice) < (nearestPrice - self.currentSqrtPrice):
-                    nearestPrice = pa
-                if pa <= self.currentSqrtPrice < pb:
-                    activePositions[id] = pos
-                    totalLiq += pos['L']
-
-        # Remove single active position if it ends exactly at current price
-        if len(activePositions) == 1:
-            pos = next(iter(activePositions.values()))
-            if (ZtO and pos['pa'] == self.currentSqrtPrice) or (not ZtO and pos['pb'] == self.currentSqrtPrice):
-                activePositions = {}
-                totalLiq = 0
-
-        return nearestPrice, activePositions, totalLiq
+    def _active_positions(self, ZtO=True):
+        """Row indices of positions providing liquidity at the current sqrt price in swap direction."""
+        price = self.currentSqrtPrice
+        pa, pb = self._pa, self._pb
+
+        if ZtO:
+            return np.flatnonzero((pa < price) & (price <= pb))
+        else:
+            return np.flatnonzero((pa <= price) & (price < pb))
 
     def _update_state_after_swap(self, delta_x, delta_y, totalActiveLiq, new_price, activePositions, ZtO=True, last=True):
         """
         Update pool state after swap step.
         Distributes deltas and fees among active liquidity providers proportionally.
         """
-        logger.debug(f'Updating pool state: price {self.currentPrice} -> {(new_price / q96) ** 2}')
-        self.currentPrice = (new_price / q96) ** 2
+        currentPrice = (new_price / q96) ** 2
+        logger.debug('Updating pool state: price %s -> %s', self.currentPrice, currentPrice)
+        self.currentPrice = currentPrice
         self.currentSqrtPrice = new_price
+        self.currentL = totalActiveLiq
 
-        for id, pos in activePositions.items():
-            share = pos['L'] / totalActiveLiq
-            if ZtO:
-                pos['x_real'] += delta_x * share * (1 - self.fee)
-                pos['y_real'] += delta_y * share
-                fees_x = delta_x / eth * share * self.fee
-                pos['fee_x'] += fees_x
-                pos['fee_in_y'] += fees_x * self.currentPrice
-            else:
-                pos['x_real'] += delta_x * share
-                pos['y_real'] += delta_y * share * (1 - self.fee)
-                fees_y = delta_y / eth * share * self.fee
-                pos['fee_y'] += fees_y
-                pos['fee_in_y'] += fees_y
+        shares = self._L[activePositions] / totalActiveLiq
+        if ZtO:
+            self._x_real[activePositions] += delta_x * shares * (1 - self.fee)
+            self._y_real[activePositions] += delta_y * shares
+            fees_x = delta_x / eth * shares * self.fee
+            self._fee_x[activePositions] += fees_x
+            self._fee_in_y[activePositions] += fees_x * self.currentPrice
+        else:
+            self._x_real[activePositions] += delta_x * shares
+            self._y_real[activePositions] += delta_y * shares * (1 - self.fee)
+            fees_y = delta_y / eth * shares * self.fee
+            self._fee_y[activePositions] += fees_y
+            self._fee_in_y[activePositions] += fees_y
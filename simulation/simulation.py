@@ -1,4 +1,5 @@
 import csv
+import numpy as np
 from .logger import logger
 
 class Simulation:
@@ -14,6 +15,11 @@ class Simulation:
         filename (str): CSV filename to save simulation data.
     """
 
+    # Number of block rows buffered before they are written to the CSV file
+    ROW_BUFFER_SIZE = 4096
+    # Number of blocks `run` checks against the no-trade region at once
+    RUN_WINDOW = 4096
+
     def __init__(self, poolClass, arbClass, blockPerSecondMoreThanOne,
                  blockPerSecondOrSecondsPerBlock, filename, save_block_info=False):
         logger.info('Simulation initiated')
@@ -33,12 +39,19 @@ class Simulation:
             self.file = open(self.filename, mode='w', newline='')
             self.writer = csv.writer(self.file)
             self.writer.writerow(['timestamp', 'currentPriceOutside', 'currentPrice', 'cumulativeVolume'])
+            self._row_buf = []
 
     def close_file(self):
         """Close CSV file if open."""
         if self.save_block_info:
+            self._flush_rows()
             self.file.close()
-            logger.info(f"Simulation data saved to {self.filename}")
+            logger.info('Simulation data saved to %s', self.filename)
+
+    def _flush_rows(self):
+        """Write buffered block rows to the CSV file."""
+        self.writer.writerows(self._row_buf)
+        self._row_buf.clear()
 
     def configure_pool(self, first_price, fee):
         """Instantiate pool with initial price and fee."""
@@ -71,11 +84,68 @@ class Simulation:
 
             # Save block info if enabled
             if self.save_block_info:
-                self.writer.writerow([
+                self._row_buf.append((
                     timestamp,
                     currentPriceOutside,
                     self.poolClass.currentPrice,
                     self.arbClass.cumulativeVolume
-                ])
+                ))
+                if len(self._row_buf) >= self.ROW_BUFFER_SIZE:
+                    self._flush_rows()
 
             self.counter = 0
+
+    def run(self, prices, timestamps):
+        """
+        Simulate consecutive seconds, same as calling `step_second` for each element of the
+        `prices` and `timestamps` arrays. Blocks with the outside price inside the arbitrage
+        no-trade region are filtered out with NumPy, only the remaining blocks go through `deal`.
+        Rows are written from array elements, so other inputs (e.g. a pandas Series of
+        Timestamps) are saved as their NumPy values rather than the original objects.
+
+        Args:
+            prices (np.ndarray): External market price for each second.
+            timestamps (np.ndarray): Timestamp for each second.
+        """
+        prices = np.asarray(prices)
+        timestamps = np.asarray(timestamps)
+        n = len(prices)
+
+        # Seconds at which a block is produced, continuing the step_second counter
+        blocks = np.flatnonzero((self.counter + 1 + np.arange(n)) % self.blockPerSecondOrSecondsPerBlock == 0)
+        self.counter = (self.counter + n) % self.blockPerSecondOrSecondsPerBlock
+        self.currentBlock += len(blocks)
+        block_prices = prices[blocks]
+        block_timestamps = timestamps[blocks]
+
+        i = 0
+        while i < len(blocks):
+            window_start = i
+            window = block_prices[i:i + self.RUN_WINDOW]
+            no_trade_region = self.arbClass.no_trade_region()
+            left_ntr, right_ntr = no_trade_region
+
+            for j in np.flatnonzero((window < left_ntr) | (window > right_ntr)) + window_start:
+                # Pool state cannot change inside the no-trade region
+                self._save_blocks(block_timestamps[i:j], block_prices[i:j])
+                self.arbClass.pass_blocks(j - i)
+                self.arbClass.deal(block_prices[j])
+                self._save_blocks(block_timestamps[j:j + 1], block_prices[j:j + 1])
+                i = j + 1
+                if self.arbClass.no_trade_region() != no_trade_region:
+                    break
+            else:
+                window_end = window_start + len(window)
+                self._save_blocks(block_timestamps[i:window_end], block_prices[i:window_end])
+                self.arbClass.pass_blocks(window_end - i)
+                i = window_end
+
+    def _save_blocks(self, timestamps, prices):
+        """Buffer rows for blocks that share the current pool price and cumulative volume."""
+        if self.save_block_info:
+            currentPrice = self.poolClass.currentPrice
+            cumulativeVolume = self.arbClass.cumulativeVolume
+            self._row_buf.extend((timestamp, price, currentPrice, cumulativeVolume)
+                                 for timestamp, price in zip(timestamps, prices.tolist()))
+            if len(self._row_buf) >= self.ROW_BUFFER_SIZE:
+                self._flush_rows()
@@ -1,17 +1,30 @@
 import math
+import numpy as np
 from .constants import q96, eth
 
 
 def liquidity0(amount, pa, pb):
     if pa > pb:
         pa, pb = pb, pa
-    return (amount * (pa * pb) / q96) / (pb - pa)
+    return liquidity0_sorted(amount, pa, pb)
 
 def liquidity1(amount, pa, pb):
     if pa > pb:
         pa, pb = pb, pa
+    return liquidity1_sorted(amount, pa, pb)
+
+def liquidity0_sorted(amount, pa, pb):
+    # Requires pa < pb
+    return (amount * (pa * pb) / q96) / (pb - pa)
+
+def liquidity1_sorted(amount, pa, pb):
+    # Requires pa < pb
     return amount * q96 / (pb - pa)
 
 def price_to_sqrtp(p):
-    return int(math.sqrt(p) * q96)
+    return math.sqrt(p) * q96
+
+def price_to_sqrtp_batch(p):
+    # float64: sqrt prices in Q96 overflow int64
+    return np.sqrt(np.asarray(p, dtype=np.float64)) * float(q96)
     
\ No newline at end of file